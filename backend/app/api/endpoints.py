@@ -1,33 +1,22 @@
 from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
-from app.db.database import get_db, AsyncSessionLocal
+from sqlalchemy.orm import defer
+from typing import List, Optional
+from app.db.database import get_db
 from app.db import models
 from app.schemas import schemas
-from app.services.workflow import create_workflow, create_qa_workflow
+from app.services.workflow import create_qa_workflow, run_stage, STAGE_NODES
+from app.services.ingestion import save_pdf, insert_documents, process_document, process_documents, DOCS_DIR
+from app.services.page_renderer import page_renderer, normalize_zoom, SUPPORTED_FORMATS, DEFAULT_ZOOM, DEFAULT_FORMAT
 import os
 
 
 router = APIRouter()
 
-processing_workflow = create_workflow()
 qa_workflow = create_qa_workflow()
 
-async def run_document_processing(doc_id: int, pdf_bytes: bytes):
-    print(f"BACKEND_DEBUG: run_document_processing started for ID {doc_id}")
-    async with AsyncSessionLocal() as db:
-        try:
-            inputs = {
-                "pdf_bytes": pdf_bytes,
-                "document_id": doc_id
-            }
-            await processing_workflow.ainvoke(inputs)
-            print(f"BACKEND_DEBUG: Processing workflow complete for document {doc_id}")
-        except Exception as e:
-            print(f"CRITICAL DB ERROR processing document {doc_id}: {e}")
-            await db.rollback()
-
 @router.post("/upload-pdf", response_model=schemas.Document)
 async def upload_pdf(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
     """
@@ -36,19 +25,39 @@ async def upload_pdf(background_tasks: BackgroundTasks, file: UploadFile = File(
     content = await file.read()
     db_doc = models.Document(filename=file.filename, content=content)
     db.add(db_doc)
+    # id comes back from INSERT ... RETURNING and expire_on_commit=False keeps
+    # the other attributes loaded, so no refresh SELECT is needed
     await db.commit()
-    await db.refresh(db_doc)
     
     # Save PDF to disk for serving
-    pdf_path = f"/data/docs/{db_doc.id}.pdf"
-    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
-    with open(pdf_path, "wb") as f:
-        f.write(content)
+    save_pdf(db_doc.id, content)
     
     # Trigger background processing - passing only ID and bytes to the background task
-    background_tasks.add_task(run_document_processing, db_doc.id, content)
+    background_tasks.add_task(process_document, db_doc.id, content, {})
     return db_doc
 
+@router.post("/upload-pdfs", response_model=List[schemas.Document])
+async def upload_pdfs(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...), db: AsyncSession = Depends(get_db)):
+    """
+    API for uploading several PDFs at once. Documents are inserted in a single
+    batch and processed in the background with bounded concurrency.
+    """
+    # Every file is read into memory for the batch insert, so large collections
+    # go through the ingestion CLI instead
+    max_files = int(os.getenv("BULK_UPLOAD_MAX_FILES", "20"))
+    if len(files) > max_files:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files ({len(files)}, max {max_files}). Use 'python -m app.services.ingestion' for large batches.",
+        )
+
+    contents = [(file.filename, await file.read()) for file in files]
+    docs = await insert_documents(db, contents)
+
+    concurrency = int(os.getenv("BULK_PROCESSING_CONCURRENCY", "4"))
+    background_tasks.add_task(process_documents, [(doc.id, doc.content) for doc in docs], concurrency)
+    return docs
+
 @router.get("/documents", response_model=List[schemas.Document])
 async def list_documents(db: AsyncSession = Depends(get_db)):
     """
@@ -70,6 +79,119 @@ async def get_document(doc_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
 
+@router.post("/documents/{doc_id}/reprocess", response_model=schemas.Document)
+async def reprocess_document(doc_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    """
+    Re-runs the processing pipeline. Stages that already succeeded on unchanged
+    input are skipped, so this resumes from the first failed or stale stage.
+    """
+    query = select(models.Document).filter(models.Document.id == doc_id)
+    result = await db.execute(query)
+    doc = result.scalar_one_or_none()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    background_tasks.add_task(process_document, doc.id, doc.content)
+    return doc
+
+@router.post("/documents/{doc_id}/stages/{stage}", response_model=schemas.Document)
+async def rerun_stage(doc_id: int, stage: str, voice: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """
+    Re-runs a single pipeline stage (extract, summarize or tts) without touching
+    the others, e.g. regenerating the summary audio with a different voice.
+    """
+    if stage not in STAGE_NODES:
+        raise HTTPException(status_code=400, detail=f"Unknown stage '{stage}'. Expected one of: {', '.join(STAGE_NODES)}")
+
+    # Only extraction needs the PDF blob
+    query = select(models.Document).filter(models.Document.id == doc_id)
+    if stage != "extract":
+        query = query.options(defer(models.Document.content))
+    result = await db.execute(query)
+    doc = result.scalar_one_or_none()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if stage == "summarize" and not doc.text_content:
+        raise HTTPException(status_code=400, detail="Document text extraction not yet complete")
+    if stage == "tts" and not doc.summary:
+        raise HTTPException(status_code=400, detail="Document summary not yet complete")
+
+    # End the read transaction so no pooled connection is held during the
+    # Gemini/edge-tts call (expire_on_commit=False keeps doc's attributes loaded)
+    await db.commit()
+
+    try:
+        await run_stage(doc, stage, voice=voice)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Stage '{stage}' failed: {e}")
+
+    await db.refresh(doc)
+    # tts_node records failures instead of raising, so check the stored status
+    if stage == "tts" and doc.tts_status == "failed":
+        raise HTTPException(status_code=500, detail=f"Stage 'tts' failed: {doc.tts_error}")
+    return doc
+
+def _page_source(doc_id: int, highlight: Optional[str]) -> str:
+    """Resolves the PDF to render: the original upload or one of its highlighted copies."""
+    if highlight:
+        if os.path.basename(highlight) != highlight or not highlight.endswith(".pdf"):
+            raise HTTPException(status_code=400, detail="Invalid highlight file name")
+        pdf_path = os.path.join("/data/highlights", highlight)
+    else:
+        pdf_path = os.path.join(DOCS_DIR, f"{doc_id}.pdf")
+    if not os.path.exists(pdf_path):
+        raise HTTPException(status_code=404, detail="PDF not found")
+    return pdf_path
+
+def _image_response(path: str, fmt: str) -> FileResponse:
+    # Cached renders never change for a given URL, so let the browser keep them
+    return FileResponse(path, media_type=f"image/{fmt}", headers={"Cache-Control": "public, max-age=86400"})
+
+@router.get("/documents/{doc_id}/pages", response_model=schemas.DocumentPages)
+async def get_document_pages(doc_id: int, highlight: Optional[str] = None):
+    """
+    Page count and page sizes, so the viewer can lay out placeholders before any image loads.
+    """
+    pages = await page_renderer.page_sizes(_page_source(doc_id, highlight))
+    return {
+        "document_id": doc_id,
+        "page_count": len(pages),
+        "default_zoom": DEFAULT_ZOOM,
+        "default_format": DEFAULT_FORMAT,
+        "pages": pages,
+    }
+
+@router.get("/documents/{doc_id}/pages/{page_number}")
+async def get_document_page(doc_id: int, page_number: int, zoom: float = DEFAULT_ZOOM, format: str = DEFAULT_FORMAT, highlight: Optional[str] = None):
+    """
+    Renders a single page (1-based) as PNG or WebP at the requested zoom level.
+    """
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Expected one of: {', '.join(SUPPORTED_FORMATS)}")
+    try:
+        zoom = normalize_zoom(zoom)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        path = await page_renderer.render_page(_page_source(doc_id, highlight), page_number, zoom, format)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _image_response(path, format)
+
+@router.get("/documents/{doc_id}/pages/{page_number}/thumbnail")
+async def get_document_thumbnail(doc_id: int, page_number: int, format: str = DEFAULT_FORMAT, highlight: Optional[str] = None):
+    """
+    Renders a small thumbnail of a single page (1-based).
+    """
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Expected one of: {', '.join(SUPPORTED_FORMATS)}")
+    try:
+        path = await page_renderer.render_thumbnail(_page_source(doc_id, highlight), page_number, format)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _image_response(path, format)
+
 @router.post("/documents/{doc_id}/query", response_model=schemas.Interaction)
 async def query_document(doc_id: int, interaction: schemas.InteractionCreate, db: AsyncSession = Depends(get_db)):
     """
@@ -12,10 +12,24 @@ class Document(Base):
     filename = Column(String, index=True)
     content = Column(LargeBinary)  # Storing PDF as blob
     text_content = Column(Text, nullable=True)
+    extraction_report = Column(JSON, nullable=True)  # per-page extraction method, length and timing
     summary = Column(Text, nullable=True)
     audio_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    # Per-stage checkpoints: status is "done" or "failed", hash is the sha256 of the stage input,
+    # error is the message of the stage's last failure (cleared when that stage succeeds)
+    extract_status = Column(String, nullable=True)
+    extract_hash = Column(String(64), nullable=True)
+    extract_error = Column(Text, nullable=True)
+    summarize_status = Column(String, nullable=True)
+    summarize_hash = Column(String(64), nullable=True)
+    summarize_error = Column(Text, nullable=True)
+    tts_status = Column(String, nullable=True)
+    tts_hash = Column(String(64), nullable=True)
+    tts_voice = Column(String, nullable=True)
+    tts_error = Column(Text, nullable=True)
+
     interactions = relationship("Interaction", back_populates="document")
 
 class Interaction(Base):
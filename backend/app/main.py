@@ -1,17 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.db.database import engine
-from app.db import models
+from app.db.database import init_db
 from app.api.endpoints import router as api_router
+from app.agents.extraction_agent import shutdown_ocr_pool
 import os
 
 app = FastAPI(title="Multi-Agent PDF QA System")
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(models.Base.metadata.create_all)
+    await init_db()
+
+@app.on_event("shutdown")
+async def shutdown():
+    shutdown_ocr_pool()
 
 # Ensure storage directories exist
 os.makedirs("/data/audio", exist_ok=True)
@@ -11,8 +11,16 @@ class DocumentCreate(DocumentBase):
 class Document(DocumentBase):
     id: int
     text_content: Optional[str] = None
+    extraction_report: Optional[List[dict]] = None
     summary: Optional[str] = None
     audio_path: Optional[str] = None
+    extract_status: Optional[str] = None
+    extract_error: Optional[str] = None
+    summarize_status: Optional[str] = None
+    summarize_error: Optional[str] = None
+    tts_status: Optional[str] = None
+    tts_voice: Optional[str] = None
+    tts_error: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -34,3 +42,15 @@ class Interaction(InteractionBase):
 
     class Config:
         from_attributes = True
+
+class PageInfo(BaseModel):
+    number: int
+    width: float
+    height: float
+
+class DocumentPages(BaseModel):
+    document_id: int
+    page_count: int
+    default_zoom: float
+    default_format: str
+    pages: List[PageInfo]
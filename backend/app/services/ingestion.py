@@ -0,0 +1,256 @@
+"""
+Bulk ingestion for onboarding large PDF collections.
+
+Documents are inserted in batches (one commit per batch), written to
+/data/docs and pushed through the processing workflow with a bounded number
+of documents in flight. Progress is recorded in a JSON checkpoint so an
+interrupted run can be resumed without re-inserting or re-processing files.
+
+Usage (inside the backend container):
+    python -m app.services.ingestion /data/import --batch-size 50 --concurrency 8
+    python -m app.services.ingestion /data/import --resume
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal, engine, init_db
+from app.db import models
+from app.services.workflow import create_workflow, load_checkpoint
+
+DOCS_DIR = "/data/docs"
+DEFAULT_CHECKPOINT = "/data/ingest_checkpoint.json"
+
+processing_workflow = create_workflow()
+
+
+@dataclass
+class IngestReport:
+    discovered: int = 0
+    skipped: int = 0
+    ingested: int = 0
+    processed: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def docs_per_minute(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.processed / (self.elapsed / 60)
+
+    def summary(self) -> str:
+        return (
+            f"Discovered {self.discovered}, skipped {self.skipped}, ingested {self.ingested}, "
+            f"processed {self.processed}, failed {self.failed} in {self.elapsed:.1f}s "
+            f"({self.docs_per_minute:.1f} docs/min)"
+        )
+
+
+class IngestCheckpoint:
+    """Tracks which files have been inserted (path -> document id) and fully processed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ingested = {}
+        self.processed = set()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        self.ingested = data.get("ingested", {})
+        self.processed = set(data.get("processed", []))
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"ingested": self.ingested, "processed": sorted(self.processed)}, f)
+        os.replace(tmp_path, self.path)
+
+
+def save_pdf(doc_id: int, content: bytes) -> str:
+    """Writes the PDF to disk so the frontend viewer can fetch it."""
+    pdf_path = os.path.join(DOCS_DIR, f"{doc_id}.pdf")
+    os.makedirs(DOCS_DIR, exist_ok=True)
+    with open(pdf_path, "wb") as f:
+        f.write(content)
+    return pdf_path
+
+
+async def insert_documents(db: AsyncSession, files: List[Tuple[str, bytes]]) -> List[models.Document]:
+    """
+    Inserts a batch of documents with a single commit and writes their PDFs to disk.
+    """
+    docs = [models.Document(filename=filename, content=content) for filename, content in files]
+    db.add_all(docs)
+    await db.commit()
+    await asyncio.to_thread(lambda: [save_pdf(doc.id, doc.content) for doc in docs])
+    print(f"DB_LOG: Batch inserted {len(docs)} documents")
+    return docs
+
+
+async def process_document(doc_id: int, pdf_bytes: bytes, checkpoint: Optional[dict] = None) -> bool:
+    """
+    Runs the processing workflow for one document. Pass checkpoint={} for freshly
+    inserted documents; otherwise the stored stage checkpoints are loaded first so
+    unchanged stages are skipped. Each stage writes its own results, so no
+    session is held open here.
+    """
+    print(f"BACKEND_DEBUG: Processing started for document {doc_id}")
+    try:
+        if checkpoint is None:
+            checkpoint = await load_checkpoint(doc_id)
+        await processing_workflow.ainvoke({"pdf_bytes": pdf_bytes, "document_id": doc_id, "checkpoint": checkpoint})
+        print(f"BACKEND_DEBUG: Processing workflow complete for document {doc_id}")
+        return True
+    except Exception as e:
+        print(f"CRITICAL ERROR processing document {doc_id}: {e}")
+        return False
+
+
+async def process_documents(items: List[Tuple[int, bytes]], concurrency: int = 4) -> IngestReport:
+    """
+    Runs the processing workflow for already-inserted documents, at most
+    `concurrency` documents at a time.
+    """
+    report = IngestReport(discovered=len(items), ingested=len(items))
+    semaphore = asyncio.Semaphore(concurrency)
+    start_time = time.perf_counter()
+
+    async def run(doc_id: int, pdf_bytes: bytes):
+        async with semaphore:
+            ok = await process_document(doc_id, pdf_bytes, checkpoint={})
+        if ok:
+            report.processed += 1
+        else:
+            report.failed += 1
+
+    await asyncio.gather(*(run(doc_id, pdf_bytes) for doc_id, pdf_bytes in items))
+    report.elapsed = time.perf_counter() - start_time
+    print(f"PERF_DEBUG: Bulk processing finished. {report.summary()}")
+    return report
+
+
+def discover_pdfs(directory: str, recursive: bool = True) -> List[str]:
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                paths.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def ingest_directory(
+    directory: str,
+    batch_size: int = 50,
+    concurrency: int = 4,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    resume: bool = False,
+    recursive: bool = True,
+) -> IngestReport:
+    """
+    Scans `directory` for PDFs, inserts them in batches and processes them with
+    bounded concurrency. The next batch is only read once there is room in the
+    pipeline, so memory use stays proportional to batch_size + concurrency.
+    """
+    checkpoint = IngestCheckpoint(checkpoint_path)
+    if resume:
+        checkpoint.load()
+
+    paths = discover_pdfs(directory, recursive)
+    report = IngestReport(discovered=len(paths))
+    pending = [p for p in paths if p not in checkpoint.processed]
+    report.skipped = len(paths) - len(pending)
+    print(f"INGEST: {len(paths)} PDFs found, {report.skipped} already processed")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    completed_since_save = 0
+    start_time = time.perf_counter()
+
+    async def run(path: str, doc_id: int, pdf_bytes: bytes, stage_checkpoint: Optional[dict]):
+        nonlocal completed_since_save
+        try:
+            ok = await process_document(doc_id, pdf_bytes, stage_checkpoint)
+        finally:
+            semaphore.release()
+        if ok:
+            report.processed += 1
+            checkpoint.processed.add(path)
+            completed_since_save += 1
+            if completed_since_save >= batch_size:
+                checkpoint.save()
+                completed_since_save = 0
+        else:
+            report.failed += 1
+
+    try:
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            contents = await asyncio.gather(*(asyncio.to_thread(_read_file, p) for p in batch))
+
+            # Files inserted by an interrupted run keep their document id and
+            # resume from their stored stage checkpoints.
+            new_files = [(p, c) for p, c in zip(batch, contents) if p not in checkpoint.ingested]
+            new_paths = {p for p, _ in new_files}
+            if new_files:
+                async with AsyncSessionLocal() as db:
+                    docs = await insert_documents(db, [(os.path.basename(p), c) for p, c in new_files])
+                for (path, _), doc in zip(new_files, docs):
+                    checkpoint.ingested[path] = doc.id
+                report.ingested += len(new_files)
+                checkpoint.save()
+
+            for path, content in zip(batch, contents):
+                await semaphore.acquire()
+                stage_checkpoint = {} if path in new_paths else None
+                tasks.append(asyncio.create_task(run(path, checkpoint.ingested[path], content, stage_checkpoint)))
+
+        await asyncio.gather(*tasks)
+    finally:
+        checkpoint.save()
+        report.elapsed = time.perf_counter() - start_time
+
+    print(f"INGEST: {report.summary()}")
+    return report
+
+
+async def _main(args):
+    await init_db()
+    try:
+        await ingest_directory(
+            args.directory,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            recursive=not args.no_recursive,
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory of PDFs.")
+    parser.add_argument("directory", help="Directory to scan for PDF files")
+    parser.add_argument("--batch-size", type=int, default=50, help="Documents inserted per DB commit")
+    parser.add_argument("--concurrency", type=int, default=4, help="Documents processed at the same time")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file used by --resume")
+    parser.add_argument("--resume", action="store_true", help="Skip files recorded in the checkpoint")
+    parser.add_argument("--no-recursive", action="store_true", help="Only scan the top-level directory")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,157 @@
+"""
+Renders single PDF pages and thumbnails to images for the viewer.
+
+Rendered images are kept in a disk cache under /data/page_cache. The cache has
+a size budget (PAGE_CACHE_MAX_MB) and evicts the least recently used files
+first; a cache hit bumps the file's mtime so it counts as recently used.
+"""
+import asyncio
+import io
+import math
+import os
+import threading
+from typing import List, Optional
+
+import fitz
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "/data/page_cache")
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_MB", "512")) * 1024 * 1024
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "200"))
+PREWARM_PAGES = int(os.getenv("PAGE_PREWARM_PAGES", "3"))
+# Thumbnails of later pages render on demand, so bulk ingestion doesn't churn the cache
+PREWARM_THUMBNAILS = int(os.getenv("PAGE_PREWARM_THUMBNAILS", "20"))
+
+SUPPORTED_FORMATS = ("png", "webp")
+MIN_ZOOM = 0.25
+MAX_ZOOM = 4.0
+# Defaults shared by prewarm, the page endpoints and the viewer (via GET /pages),
+# so pre-rendered images have the same cache keys the viewer asks for
+DEFAULT_ZOOM = float(os.getenv("PAGE_DEFAULT_ZOOM", "1.5"))
+DEFAULT_FORMAT = os.getenv("PAGE_DEFAULT_FORMAT", "webp")
+
+
+def normalize_zoom(zoom: float) -> float:
+    """Clamps the zoom into range and rounds it so cache keys stay bounded."""
+    if not math.isfinite(zoom):
+        raise ValueError("Zoom must be a finite number")
+    return round(min(max(zoom, MIN_ZOOM), MAX_ZOOM), 2)
+
+
+class PageRenderer:
+    def __init__(self, cache_dir: str = PAGE_CACHE_DIR, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._cache_size = None  # computed lazily from disk
+        self._prewarm_limit = asyncio.Semaphore(int(os.getenv("PAGE_PREWARM_CONCURRENCY", "1")))
+
+    async def page_sizes(self, pdf_path: str) -> List[dict]:
+        """Returns the width and height (in points) of every page."""
+        return await asyncio.to_thread(self._page_sizes_sync, pdf_path)
+
+    def _page_sizes_sync(self, pdf_path: str) -> List[dict]:
+        with fitz.open(pdf_path) as doc:
+            return [
+                {"number": i + 1, "width": page.rect.width, "height": page.rect.height}
+                for i, page in enumerate(doc)
+            ]
+
+    async def render_page(self, pdf_path: str, page_number: int, zoom: float = DEFAULT_ZOOM, fmt: str = DEFAULT_FORMAT) -> str:
+        """
+        Renders a 1-based page at the given zoom and returns the path of the cached image.
+        """
+        zoom = normalize_zoom(zoom)
+        return await asyncio.to_thread(self._render_sync, pdf_path, page_number, zoom, None, fmt)
+
+    async def render_thumbnail(self, pdf_path: str, page_number: int, fmt: str = DEFAULT_FORMAT) -> str:
+        """Renders a 1-based page scaled to THUMBNAIL_WIDTH pixels wide."""
+        return await asyncio.to_thread(self._render_sync, pdf_path, page_number, None, THUMBNAIL_WIDTH, fmt)
+
+    async def prewarm(self, pdf_path: str):
+        """Renders the first thumbnails and pages so the viewer's first paint is a cache hit."""
+        async with self._prewarm_limit:
+            try:
+                sizes = await self.page_sizes(pdf_path)
+                for page in sizes[:PREWARM_THUMBNAILS]:
+                    await self.render_thumbnail(pdf_path, page["number"], DEFAULT_FORMAT)
+                for page in sizes[:PREWARM_PAGES]:
+                    await self.render_page(pdf_path, page["number"], DEFAULT_ZOOM, DEFAULT_FORMAT)
+                print(f"PERF_DEBUG: Pre-warmed page cache for {pdf_path} ({len(sizes)} pages)")
+            except Exception as e:
+                print(f"ERROR pre-warming page cache for {pdf_path}: {e}")
+
+    def _cache_path(self, pdf_path: str, page_number: int, zoom: Optional[float], width: Optional[int], fmt: str) -> str:
+        # The source mtime is part of the key, so a rewritten PDF never serves stale pages
+        source = os.path.splitext(os.path.basename(pdf_path))[0]
+        source_dir = os.path.basename(os.path.dirname(pdf_path))
+        mtime = int(os.stat(pdf_path).st_mtime)
+        size = f"z{zoom}" if zoom is not None else f"w{width}"
+        return os.path.join(self.cache_dir, f"{source_dir}_{source}_{mtime}_p{page_number}_{size}.{fmt}")
+
+    def _render_sync(self, pdf_path: str, page_number: int, zoom: Optional[float], width: Optional[int], fmt: str) -> str:
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported image format '{fmt}'")
+
+        cache_path = self._cache_path(pdf_path, page_number, zoom, width, fmt)
+        if os.path.exists(cache_path):
+            os.utime(cache_path)
+            return cache_path
+
+        with fitz.open(pdf_path) as doc:
+            if page_number < 1 or page_number > doc.page_count:
+                raise IndexError(f"Page {page_number} out of range (1-{doc.page_count})")
+            page = doc[page_number - 1]
+            scale = zoom if zoom is not None else width / page.rect.width
+            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+            data = self._encode(pix, fmt)
+
+        # Created on first write rather than at import, so importing this module has no side effects
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+        self._track(len(data))
+        return cache_path
+
+    def _encode(self, pix: "fitz.Pixmap", fmt: str) -> bytes:
+        if fmt == "png":
+            return pix.tobytes("png")
+        # PyMuPDF cannot write WebP itself
+        from PIL import Image
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        buf = io.BytesIO()
+        image.save(buf, format="WEBP", quality=80)
+        return buf.getvalue()
+
+    def _track(self, added: int):
+        with self._lock:
+            if self._cache_size is None:
+                self._cache_size = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+            else:
+                self._cache_size += added
+            if self._cache_size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Deletes least recently used files until the cache is at 90% of its budget."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        target = self.max_bytes * 0.9
+        removed = 0
+        for entry in entries:
+            if self._cache_size <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            self._cache_size -= size
+            removed += 1
+        print(f"DEBUG: Page cache evicted {removed} files, now {self._cache_size / 1024 / 1024:.1f} MB")
+
+
+page_renderer = PageRenderer()
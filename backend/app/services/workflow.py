@@ -4,9 +4,20 @@ import operator
 import os
 import time
 import asyncio
-from app.db.database import AsyncSessionLocal
+import hashlib
+from app.db.database import engine
 from app.db import models
-from sqlalchemy import select
+from app.services.page_renderer import page_renderer
+from sqlalchemy import select, update
+
+# Per-stage concurrency limits. Every document in flight (single uploads and
+# bulk ingestion alike) shares these, so a large batch queues up instead of
+# opening hundreds of Gemini/edge-tts calls at once.
+STAGE_LIMITS = {
+    "extract": asyncio.Semaphore(int(os.getenv("EXTRACT_CONCURRENCY", "4"))),
+    "summarize": asyncio.Semaphore(int(os.getenv("SUMMARIZE_CONCURRENCY", "4"))),
+    "tts": asyncio.Semaphore(int(os.getenv("TTS_CONCURRENCY", "4"))),
+}
 
 class AgentState(TypedDict):
     pdf_bytes: bytes
@@ -20,58 +31,132 @@ class AgentState(TypedDict):
     quotes: List[str]
     document_id: int
     chat_history: List[dict]
+    checkpoint: dict
+    force_stages: List[str]
+    voice: str
+
+CHECKPOINT_FIELDS = [
+    "text_content", "summary", "audio_path",
+    "extract_status", "extract_hash",
+    "summarize_status", "summarize_hash",
+    "tts_status", "tts_hash", "tts_voice",
+]
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+_background_tasks = set()
+
+def content_hash(*parts) -> str:
+    """sha256 over the given str/bytes parts, used as the input hash of a stage."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(part or b"")
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+async def load_checkpoint(doc_id: int) -> dict:
+    """Reads the stored stage outputs and checkpoints of a document (without the PDF blob)."""
+    columns = [getattr(models.Document, field) for field in CHECKPOINT_FIELDS]
+    async with engine.connect() as conn:
+        res = await conn.execute(select(*columns).where(models.Document.id == doc_id))
+        row = res.mappings().first()
+    return dict(row) if row else {}
+
+def can_skip_stage(state: AgentState, stage: str, input_hash: str) -> bool:
+    """A stage is skipped when it already succeeded on exactly the same input."""
+    if stage in (state.get("force_stages") or []):
+        return False
+    checkpoint = state.get("checkpoint") or {}
+    return checkpoint.get(f"{stage}_status") == "done" and checkpoint.get(f"{stage}_hash") == input_hash
+
+async def save_stage(doc_id: int, **values):
+    """Persists stage outputs and checkpoint columns with a single UPDATE statement."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(models.Document).where(models.Document.id == doc_id).values(**values)
+        )
 
 async def extraction_node(state: AgentState):
     start_time = time.perf_counter()
+    doc_id = state["document_id"]
+    from app.agents.extraction_agent import ExtractionAgent, EXTRACTION_MODE
+    # The extraction mode is part of the input, so switching modes re-extracts
+    input_hash = content_hash(state["pdf_bytes"], EXTRACTION_MODE)
+    if can_skip_stage(state, "extract", input_hash):
+        print(f"DEBUG: Skipping Extraction Node for doc {doc_id}, PDF unchanged")
+        return {"text_content": state["checkpoint"]["text_content"], "metadata": {}}
+
     print("DEBUG: Starting Extraction Node")
     try:
-        from app.agents.extraction_agent import ExtractionAgent
         agent = ExtractionAgent()
-        # Extraction can be CPU bound, but since it's PyMuPDF it's usually fast.
-        # We can run it in a thread if needed, but for now we'll just await if it were async.
-        text = await agent.extract_text(state["pdf_bytes"])
-        metadata = await agent.extract_metadata(state["pdf_bytes"])
+        # Text layer extraction runs in a thread under the stage limit. OCR has its
+        # own bounded process pool, so scanned pages don't hold extraction slots.
+        async with STAGE_LIMITS["extract"]:
+            pages = await agent.extract_pages(state["pdf_bytes"])
+            metadata = await agent.extract_metadata(state["pdf_bytes"])
+        pages = await agent.ocr_pages(state["pdf_bytes"], pages)
+        text = agent.pages_to_text(pages)
+        report = agent.pages_report(pages)
         duration = time.perf_counter() - start_time
-        print(f"PERF_DEBUG: Extraction took {duration:.2f}s. Text length: {len(text)}")
+        ocr_count = sum(1 for page in report if page["method"] == "ocr")
+        print(f"PERF_DEBUG: Extraction took {duration:.2f}s. Text length: {len(text)}, pages: {len(report)}, OCR pages: {ocr_count}")
         
         # Immediate DB Update for Text Readiness
-        async with AsyncSessionLocal() as db:
-            query = select(models.Document).filter(models.Document.id == state["document_id"])
-            res = await db.execute(query)
-            db_doc = res.scalar_one_or_none()
-            if db_doc:
-                db_doc.text_content = text
-                await db.commit()
-                print(f"DB_LOG: Partial update - Extraction complete for doc {state['document_id']}")
+        await save_stage(
+            doc_id,
+            text_content=text,
+            extraction_report=report,
+            extract_status="done",
+            extract_hash=input_hash,
+            extract_error=None,
+        )
+        print(f"DB_LOG: Partial update - Extraction complete for doc {doc_id}")
+
+        # Pre-warm the page image cache without holding up summarization
+        pdf_path = f"/data/docs/{doc_id}.pdf"
+        if os.path.exists(pdf_path):
+            task = asyncio.create_task(page_renderer.prewarm(pdf_path))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
 
         return {"text_content": text, "metadata": metadata}
     except Exception as e:
         print(f"CRITICAL ERROR in extraction_node: {e}")
+        await save_stage(doc_id, extract_status="failed", extract_error=str(e))
         raise e
 
 async def summarization_node(state: AgentState):
     start_time = time.perf_counter()
+    doc_id = state["document_id"]
+    input_hash = content_hash(state["text_content"])
+    if can_skip_stage(state, "summarize", input_hash):
+        print(f"DEBUG: Skipping Summarization Node for doc {doc_id}, text unchanged")
+        return {"summary": state["checkpoint"]["summary"]}
+
     print("DEBUG: Starting Summarization Node")
     try:
         from app.agents.summarization_agent import SummarizationAgent
         agent = SummarizationAgent()
-        summary = await agent.generate_summary(state["text_content"])
+        async with STAGE_LIMITS["summarize"]:
+            summary = await agent.generate_summary(state["text_content"])
         duration = time.perf_counter() - start_time
         print(f"PERF_DEBUG: Summarization took {duration:.2f}s. Summary length: {len(summary)}")
         
         # Immediate DB Update for Summary Readiness
-        async with AsyncSessionLocal() as db:
-            query = select(models.Document).filter(models.Document.id == state["document_id"])
-            res = await db.execute(query)
-            db_doc = res.scalar_one_or_none()
-            if db_doc:
-                db_doc.summary = summary
-                await db.commit()
-                print(f"DB_LOG: Partial update - Summary complete for doc {state['document_id']}")
+        await save_stage(
+            doc_id,
+            summary=summary,
+            summarize_status="done",
+            summarize_hash=input_hash,
+            summarize_error=None,
+        )
+        print(f"DB_LOG: Partial update - Summary complete for doc {doc_id}")
 
         return {"summary": summary}
     except Exception as e:
         print(f"CRITICAL ERROR in summarization_node: {e}")
+        await save_stage(doc_id, summarize_status="failed", summarize_error=str(e))
         raise e
 
 import re
@@ -93,10 +178,20 @@ async def tts_node(state: dict):
     summary_text = state.get("summary")
     doc_id = state.get("document_id")
     
-    print(f"DEBUG: Starting TTS Node for doc_id: {doc_id}")
+    checkpoint = state.get("checkpoint") or {}
     if not summary_text:
         return {"audio_path": None}
 
+    from app.agents.tts_agent import DEFAULT_VOICE
+    voice = state.get("voice") or checkpoint.get("tts_voice") or DEFAULT_VOICE
+    input_hash = content_hash(summary_text, voice)
+    previous_audio = checkpoint.get("audio_path")
+    if can_skip_stage(state, "tts", input_hash) and previous_audio and os.path.exists(previous_audio):
+        print(f"DEBUG: Skipping TTS Node for doc {doc_id}, summary and voice unchanged")
+        return {"audio_path": previous_audio}
+
+    print(f"DEBUG: Starting TTS Node for doc_id: {doc_id}")
+
     try:
         audio_filename = f"audio_{doc_id}.mp3"
         audio_dir = "/data/audio"
@@ -109,7 +204,8 @@ async def tts_node(state: dict):
         # Use new Async TTS Agent
         from app.agents.tts_agent import TTSAgent
         agent = TTSAgent()
-        audio_path = await agent.generate_audio(clean_text)
+        async with STAGE_LIMITS["tts"]:
+            audio_path = await agent.generate_audio(clean_text, voice)
         
         # Extract filename from path for logging
         audio_filename = os.path.basename(audio_path)
@@ -120,18 +216,29 @@ async def tts_node(state: dict):
         audio_path = f"/data/audio/{audio_filename}"
         
         # Immediate DB Update for Audio Readiness
-        async with AsyncSessionLocal() as db:
-            query = select(models.Document).filter(models.Document.id == doc_id)
-            res = await db.execute(query)
-            db_doc = res.scalar_one_or_none()
-            if db_doc:
-                db_doc.audio_path = audio_path
-                await db.commit()
-                print(f"DB_LOG: Partial update - Audio complete for doc {doc_id}")
+        await save_stage(
+            doc_id,
+            audio_path=audio_path,
+            tts_status="done",
+            tts_hash=input_hash,
+            tts_voice=voice,
+            tts_error=None,
+        )
+        print(f"DB_LOG: Partial update - Audio complete for doc {doc_id}")
+
+        # Every run writes a new uuid-named file, so remove the one it replaced
+        if previous_audio and previous_audio != audio_path:
+            try:
+                os.remove(previous_audio)
+            except OSError as e:
+                print(f"DEBUG: Could not remove previous audio {previous_audio}: {e}")
 
         return {"audio_path": audio_path}
     except Exception as e:
+        # TTS stays non-fatal for the pipeline, but the failure is recorded so
+        # the stage can be retried via the rerun endpoint.
         print(f"CRITICAL ERROR in TTS Node: {e}")
+        await save_stage(doc_id, tts_status="failed", tts_error=str(e))
         return {"audio_path": None}
 
 async def qa_node(state: AgentState):
@@ -163,6 +270,29 @@ async def highlighting_node(state: AgentState):
         print(f"CRITICAL ERROR in highlighting_node: {e}")
         raise e
 
+STAGE_NODES = {
+    "extract": extraction_node,
+    "summarize": summarization_node,
+    "tts": tts_node,
+}
+
+async def run_stage(doc: models.Document, stage: str, voice: str = None) -> dict:
+    """
+    Reruns a single processing stage for a document, using the stored outputs of
+    the other stages as its inputs. The stage always runs, even if its input is unchanged.
+    Only the extract stage reads the PDF blob, so callers may defer it for the others.
+    """
+    state = {
+        "pdf_bytes": doc.content if stage == "extract" else None,
+        "text_content": doc.text_content,
+        "summary": doc.summary,
+        "document_id": doc.id,
+        "checkpoint": {field: getattr(doc, field) for field in CHECKPOINT_FIELDS},
+        "force_stages": [stage],
+        "voice": voice,
+    }
+    return await STAGE_NODES[stage](state)
+
 def create_workflow():
     workflow = StateGraph(AgentState)
 
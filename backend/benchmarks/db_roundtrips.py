@@ -0,0 +1,108 @@
+"""
+Counts database usage for one upload: SQL statements, connection checkouts and
+transactions, from POST /upload-pdf through the end of background processing.
+
+Statements are counted with SQLAlchemy's before_cursor_execute event, so this
+is not a count of network round trips: BEGIN/COMMIT and asyncpg's prepare
+steps are not included.
+
+The agents are replaced with stubs so only database traffic is measured. The
+uploaded documents are real rows, so point it at a dev database. Needs the
+configured DATABASE_URL and /data (run inside the backend container):
+    python -m benchmarks.db_roundtrips --uploads 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import event
+
+from app.db.database import engine, init_db, DB_POOL_PRE_PING
+
+
+class StubExtractionAgent:
+    async def extract_pages(self, pdf_bytes: bytes) -> list:
+        return [{"page": 1, "method": "stub", "chars": 19, "text": "Stub document text.", "seconds": 0.0}]
+
+    async def ocr_pages(self, pdf_bytes: bytes, pages: list) -> list:
+        return pages
+
+    async def extract_metadata(self, pdf_bytes: bytes) -> dict:
+        return {}
+
+    pages_to_text = staticmethod(lambda pages: "\n".join(page["text"] for page in pages))
+    pages_report = staticmethod(lambda pages: pages)
+
+
+class StubSummarizationAgent:
+    async def generate_summary(self, text: str) -> str:
+        return "Stub summary."
+
+
+class StubTTSAgent:
+    async def generate_audio(self, text: str, voice: str = None) -> str:
+        return "/data/audio/stub.mp3"
+
+
+class DBUsageCounter:
+    def __init__(self, sync_engine):
+        self.statements = 0
+        self.checkouts = 0
+        self.commits = 0
+        event.listen(sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(sync_engine, "commit", self._on_commit)
+        event.listen(sync_engine.pool, "checkout", self._on_checkout)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def _on_checkout(self, *args):
+        self.checkouts += 1
+
+    def reset(self):
+        self.statements = self.checkouts = self.commits = 0
+
+
+def install_stubs():
+    import app.agents.extraction_agent as extraction_agent
+    import app.agents.summarization_agent as summarization_agent
+    import app.agents.tts_agent as tts_agent
+    extraction_agent.ExtractionAgent = StubExtractionAgent
+    summarization_agent.SummarizationAgent = StubSummarizationAgent
+    tts_agent.TTSAgent = StubTTSAgent
+
+
+async def main(uploads: int):
+    install_stubs()
+    from app.main import app
+
+    await init_db()
+    counter = DBUsageCounter(engine.sync_engine)
+    counter.reset()
+
+    # Starlette runs background tasks before the ASGI call returns, so each
+    # request below covers the upload and the full processing pipeline.
+    transport = httpx.ASGITransport(app=app)
+    start_time = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(uploads):
+            files = {"file": (f"bench_{i}.pdf", b"%PDF-1.4 benchmark " + str(i).encode(), "application/pdf")}
+            res = await client.post("/upload-pdf", files=files)
+            res.raise_for_status()
+    elapsed = time.perf_counter() - start_time
+    await engine.dispose()
+
+    print(f"Uploads: {uploads} in {elapsed:.2f}s (pool_pre_ping={DB_POOL_PRE_PING})")
+    print(f"Statements per upload:  {counter.statements / uploads:.1f}")
+    print(f"Checkouts per upload:   {counter.checkouts / uploads:.1f}")
+    print(f"Commits per upload:     {counter.commits / uploads:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count DB statements, checkouts and commits per upload.")
+    parser.add_argument("--uploads", type=int, default=20)
+    asyncio.run(main(parser.parse_args().uploads))
@@ -0,0 +1,190 @@
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz
+import pytest
+
+from app.agents import extraction_agent
+from app.agents.extraction_agent import ExtractionAgent
+
+PAGE_WIDTH = 612
+
+
+def _order(blocks):
+    items = [(fitz.Rect(*rect), text) for rect, text in blocks]
+    return [text for _, text in ExtractionAgent(mode="layout")._reading_order(items, PAGE_WIDTH)]
+
+
+def _pdf(lines):
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=792)
+    for point, text in lines:
+        page.insert_text(point, text, fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_two_column_page_reads_left_column_first():
+    blocks = [
+        ((50, 40, 560, 60), "Title"),
+        ((50, 100, 290, 150), "L1"),
+        ((320, 100, 560, 140), "R1"),
+        ((320, 150, 560, 220), "R2"),
+        ((50, 160, 290, 210), "L2"),
+        ((50, 700, 560, 720), "Footer spanning both columns"),
+    ]
+    assert _order(blocks) == ["Title", "L1", "L2", "R1", "R2", "Footer spanning both columns"]
+
+
+
+def test_centered_title_above_two_columns_is_not_interleaved():
+    blocks = [
+        ((200, 40, 400, 60), "Title"),
+        ((50, 100, 290, 150), "L1"),
+        ((320, 100, 560, 150), "R1"),
+        ((50, 160, 290, 210), "L2"),
+        ((320, 160, 560, 210), "R2"),
+    ]
+    assert _order(blocks) == ["Title", "L1", "L2", "R1", "R2"]
+
+
+def test_caption_spanning_gutter_splits_columns_above_and_below():
+    blocks = [
+        ((50, 100, 290, 150), "L1"),
+        ((320, 100, 560, 150), "R1"),
+        ((150, 170, 450, 185), "Figure 1: caption"),
+        ((50, 200, 290, 250), "L2"),
+        ((320, 200, 560, 250), "R2"),
+    ]
+    assert _order(blocks) == ["L1", "R1", "Figure 1: caption", "L2", "R2"]
+
+
+def test_layout_text_reads_columns_under_a_centered_title():
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=792)
+    page.insert_textbox(fitz.Rect(150, 40, 460, 70), "Centered Title", fontsize=14, align=fitz.TEXT_ALIGN_CENTER)
+    for x0, side in ((50, "Left"), (320, "Right")):
+        page.insert_textbox(fitz.Rect(x0, 100, x0 + 240, 200), f"{side} first paragraph " * 8, fontsize=11)
+        page.insert_textbox(fitz.Rect(x0, 220, x0 + 240, 320), f"{side} second paragraph " * 8, fontsize=11)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+
+    pages = ExtractionAgent(mode="layout", ocr_enabled=False)._extract_pages_sync(pdf_bytes)
+    text = pages[0]["text"]
+    starts = [text.index(marker) for marker in ("Centered Title", "Left first", "Left second", "Right first", "Right second")]
+    assert starts == sorted(starts)
+    assert text.rindex("Left") < text.index("Right")
+
+def test_single_column_indented_blocks_keep_top_to_bottom_order():
+    blocks = [
+        ((50, 100, 160, 112), "Requirements:"),
+        ((60, 116, 200, 128), "- Item A"),
+        ((120, 132, 260, 144), "* detail of A"),
+        ((60, 148, 200, 160), "- Item B"),
+        ((120, 164, 260, 176), "* detail of B"),
+        ((400, 200, 480, 212), "Signed, Bob"),
+    ]
+    assert _order(blocks) == [
+        "Requirements:", "- Item A", "* detail of A", "- Item B", "* detail of B", "Signed, Bob",
+    ]
+
+
+def test_layout_text_keeps_nested_list_order():
+    pdf_bytes = _pdf([
+        ((50, 100), "Requirements:"),
+        ((60, 130), "- Item A"),
+        ((120, 160), "* detail of A"),
+        ((60, 190), "- Item B"),
+        ((120, 220), "* detail of B"),
+        ((50, 260), "Signed, Bob"),
+    ])
+    agent = ExtractionAgent(mode="layout", ocr_enabled=False)
+    pages = agent._extract_pages_sync(pdf_bytes)
+    lines = [line for line in pages[0]["text"].splitlines() if line.strip()]
+    assert lines == ["Requirements:", "- Item A", "* detail of A", "- Item B", "* detail of B", "Signed, Bob"]
+
+
+class _FakePool:
+    """Stands in for the OCR process pool; broken pools refuse work like a pool with a dead worker."""
+
+    def __init__(self, broken):
+        self.broken = broken
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool("A child process terminated abruptly")
+        future = Future()
+        future.set_result("recognised text")
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_ocr_restarts_a_broken_pool_once(monkeypatch):
+    pools = iter([_FakePool(broken=True), _FakePool(broken=False)])
+    monkeypatch.setattr(extraction_agent, "ProcessPoolExecutor", lambda **kwargs: next(pools))
+    monkeypatch.setattr(extraction_agent, "_ocr_pool", None)
+
+    assert asyncio.run(extraction_agent._run_ocr(b"png")) == "recognised text"
+    assert extraction_agent._ocr_pool.broken is False
+
+
+def _table_pdf():
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=792)
+    for row in range(3):
+        for col in range(3):
+            cell = fitz.Rect(50 + col * 100, 100 + row * 20, 150 + col * 100, 120 + row * 20)
+            page.draw_rect(cell)
+            page.insert_text((cell.x0 + 5, cell.y0 + 14), f"r{row}c{col}", fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_table_text_is_kept_when_to_markdown_is_unavailable(monkeypatch):
+    table_module = pytest.importorskip("pymupdf.table")
+    monkeypatch.delattr(table_module.Table, "to_markdown")
+
+    pages = ExtractionAgent(mode="layout", ocr_enabled=False)._extract_pages_sync(_table_pdf())
+    assert all(f"r{row}c{col}" in pages[0]["text"] for row in range(3) for col in range(3))
+
+
+def _scanned_pdf():
+    scan = fitz.open()
+    scan_page = scan.new_page(width=200, height=100)
+    scan_page.insert_text((20, 50), "Scanned words", fontsize=14)
+    pixmap = scan_page.get_pixmap()
+    scan.close()
+
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=792)
+    page.insert_image(fitz.Rect(50, 50, 450, 250), pixmap=pixmap)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_image_only_page_is_marked_for_ocr():
+    pages = ExtractionAgent(mode="layout", ocr_enabled=True)._extract_pages_sync(_scanned_pdf())
+    assert pages[0]["needs_ocr"] is True
+    assert pages[0]["chars"] < extraction_agent.MIN_TEXT_CHARS
+
+    pages = ExtractionAgent(mode="layout", ocr_enabled=False)._extract_pages_sync(_scanned_pdf())
+    assert "needs_ocr" not in pages[0]
+
+
+def test_extraction_report_records_ocr_pages(monkeypatch):
+    monkeypatch.setattr(extraction_agent, "ProcessPoolExecutor", lambda **kwargs: _FakePool(broken=False))
+    monkeypatch.setattr(extraction_agent, "_ocr_pool", None)
+
+    text, report = asyncio.run(ExtractionAgent(mode="layout", ocr_enabled=True).extract_with_report(_scanned_pdf()))
+    assert text == "recognised text"
+    assert len(report) == 1
+    page = report[0]
+    assert set(page) == {"page", "method", "chars", "seconds", "ocr_seconds"}
+    assert (page["page"], page["method"], page["chars"]) == (1, "ocr", len("recognised text"))
+    assert page["seconds"] >= page["ocr_seconds"]
@@ -0,0 +1,60 @@
+import asyncio
+import math
+
+import fitz
+import pytest
+
+from app.services import page_renderer
+from app.services.page_renderer import PageRenderer, normalize_zoom, DEFAULT_ZOOM, DEFAULT_FORMAT
+
+
+@pytest.mark.parametrize("zoom", [math.nan, math.inf, -math.inf])
+def test_normalize_zoom_rejects_non_finite(zoom):
+    with pytest.raises(ValueError):
+        normalize_zoom(zoom)
+
+
+def test_normalize_zoom_clamps_and_rounds():
+    assert normalize_zoom(10) == 4.0
+    assert normalize_zoom(0.01) == 0.25
+    assert normalize_zoom(1.234) == 1.23
+
+
+def test_prewarm_populates_the_default_viewer_renders(tmp_path):
+    pytest.importorskip("PIL")
+    pdf_path = tmp_path / "1.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 50), "Hello")
+    doc.save(str(pdf_path))
+    doc.close()
+
+    renderer = PageRenderer(cache_dir=str(tmp_path / "cache"))
+
+    async def run():
+        await renderer.prewarm(str(pdf_path))
+        prewarmed = sorted(p.name for p in (tmp_path / "cache").iterdir())
+        await renderer.render_page(str(pdf_path), 1, DEFAULT_ZOOM, DEFAULT_FORMAT)
+        await renderer.render_thumbnail(str(pdf_path), 1, DEFAULT_FORMAT)
+        return prewarmed, sorted(p.name for p in (tmp_path / "cache").iterdir())
+
+    prewarmed, after = asyncio.run(run())
+    assert len(prewarmed) == 2
+    assert prewarmed == after
+
+
+def test_prewarm_caps_thumbnails(tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    monkeypatch.setattr(page_renderer, "PREWARM_THUMBNAILS", 2)
+    monkeypatch.setattr(page_renderer, "PREWARM_PAGES", 1)
+    pdf_path = tmp_path / "1.pdf"
+    doc = fitz.open()
+    for _ in range(5):
+        doc.new_page()
+    doc.save(str(pdf_path))
+    doc.close()
+
+    renderer = PageRenderer(cache_dir=str(tmp_path / "cache"))
+    asyncio.run(renderer.prewarm(str(pdf_path)))
+    names = [p.name for p in (tmp_path / "cache").iterdir()]
+    assert sorted(name.split("_")[-2] for name in names if name.split("_")[-1].startswith("w")) == ["p1", "p2"]
+    assert len(names) == 3
@@ -9,6 +9,7 @@ import {
 } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 import PDFViewer from './components/PDFViewer';
+import PageImageViewer from './components/PageImageViewer';
 import AudioPlayer from './components/AudioPlayer';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
@@ -75,6 +76,9 @@ function App() {
     const [fullAudioPath, setFullAudioPath] = useState(null);
     const [generatingAudio, setGeneratingAudio] = useState(false);
     const [playingSelectionText, setPlayingSelectionText] = useState('');
+    // 'interactive' loads the full PDF for quote highlighting, selection & search;
+    // 'pages' shows lazily loaded page images for a fast first look at large documents
+    const [viewMode, setViewMode] = useState('interactive');
 
     // Hidden audio element for selection playback
     const selectionAudioRef = React.useRef(null);
@@ -93,6 +97,11 @@ function App() {
         }
     }, [selectedDoc]);
 
+    // Quote jumping only works in the full PDF viewer
+    useEffect(() => {
+        if (activeQuote) setViewMode('interactive');
+    }, [activeQuote]);
+
     // Polling for document completion
     useEffect(() => {
         let interval;
@@ -129,15 +138,24 @@ function App() {
     };
 
     const handleUpload = async (e) => {
-        const file = e.target.files[0];
-        if (!file) return;
+        const files = Array.from(e.target.files);
+        if (!files.length) return;
         setUploading(true);
         try {
-            const res = await documentApi.upload(file);
-            setSelectedDoc(res.data); // Select the info immediately
+            if (files.length === 1) {
+                const res = await documentApi.upload(files[0]);
+                setSelectedDoc(res.data); // Select the info immediately
+            } else {
+                // Several files go through the batch endpoint (one insert, bounded processing)
+                const res = await documentApi.uploadMany(files);
+                setSelectedDoc(res.data[0]);
+            }
             loadDocuments();
-        } catch (err) { console.error("Upload error:", err); }
-        finally { setUploading(false); }
+        } catch (err) { console.error("Upload error:", err.response?.data?.detail || err); }
+        finally {
+            setUploading(false);
+            e.target.value = '';
+        }
     };
 
     const handleQuery = async (e) => {
@@ -245,9 +263,9 @@ function App() {
                     <label className="flex flex-col items-center justify-center w-full p-4 mb-2 border-2 border-dashed border-slate-800 rounded-2xl cursor-pointer hover:border-sky-500/40 hover:bg-sky-500/5 transition-all group">
                         {uploading ? <Loader2 className="animate-spin text-sky-500" /> : <Upload className="text-slate-600 group-hover:text-sky-500" size={24} />}
                         <span className="mt-2 text-[10px] font-bold text-slate-500 uppercase tracking-wider">
-                            {uploading ? 'Processing...' : 'Upload PDF'}
+                            {uploading ? 'Processing...' : 'Upload PDFs'}
                         </span>
-                        <input type="file" className="hidden" accept=".pdf" onChange={handleUpload} />
+                        <input type="file" className="hidden" accept=".pdf" multiple onChange={handleUpload} />
                     </label>
                 </div>
 
@@ -429,15 +447,35 @@ function App() {
                                         className="hidden"
                                     />
 
+                                    {/* Viewer Mode Toggle */}
+                                    <div className="flex items-center justify-end gap-2 mb-3">
+                                        {['pages', 'interactive'].map((mode) => (
+                                            <button
+                                                key={mode}
+                                                onClick={() => setViewMode(mode)}
+                                                className={`px-3 py-1 text-[10px] font-bold uppercase tracking-wider rounded-lg transition-colors ${viewMode === mode ? 'bg-sky-500 text-white' : 'bg-white/5 text-slate-400 hover:text-slate-200'}`}
+                                            >
+                                                {mode === 'pages' ? 'Quick View' : 'Interactive'}
+                                            </button>
+                                        ))}
+                                    </div>
+
                                     {/* PDF Viewer Container */}
                                     <div className="bg-[#1e1933] rounded-2xl overflow-hidden border border-white/5 min-h-[600px] shadow-2xl">
-                                        <PDFViewer
-                                            key={currentPdfUrl}
-                                            fileUrl={currentPdfUrl}
-                                            highlightQuote={activeQuote}
-                                            onReadSelection={handleReadSelection}
-                                            playingSelectionText={playingSelectionText}
-                                        />
+                                        {viewMode === 'pages' ? (
+                                            <PageImageViewer
+                                                documentId={selectedDoc.id}
+                                                highlight={currentPdfUrl && currentPdfUrl.includes('/data/highlights/') ? currentPdfUrl.split('/').pop() : undefined}
+                                            />
+                                        ) : (
+                                            <PDFViewer
+                                                key={currentPdfUrl}
+                                                fileUrl={currentPdfUrl}
+                                                highlightQuote={activeQuote}
+                                                onReadSelection={handleReadSelection}
+                                                playingSelectionText={playingSelectionText}
+                                            />
+                                        )}
                                     </div>
                                 </section>
                             </div>
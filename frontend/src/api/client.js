@@ -6,6 +6,12 @@ const api = axios.create({
     baseURL: API_URL,
 });
 
+// Leaves out unset params, so the server's defaults apply (e.g. page zoom/format)
+const queryString = (params) => {
+    const query = new URLSearchParams(Object.entries(params).filter(([, value]) => value != null)).toString();
+    return query ? `?${query}` : '';
+};
+
 export const documentApi = {
     upload: (file) => {
         const formData = new FormData();
@@ -14,11 +20,25 @@ export const documentApi = {
             headers: { 'Content-Type': 'multipart/form-data' },
         });
     },
+    uploadMany: (files) => {
+        const formData = new FormData();
+        files.forEach((file) => formData.append('files', file));
+        return api.post('/upload-pdfs', formData, {
+            headers: { 'Content-Type': 'multipart/form-data' },
+        });
+    },
     list: () => api.get('/documents'),
     get: (id) => api.get(`/documents/${id}`),
     query: (document_id, query) => api.post(`/documents/${document_id}/query`, { document_id, query }),
     getInteractions: (id) => api.get(`/documents/${id}/interactions`),
     generateFullAudio: (id) => api.post(`/documents/${id}/generate-audio`),
+    reprocess: (id) => api.post(`/documents/${id}/reprocess`),
+    rerunStage: (id, stage, voice) => api.post(`/documents/${id}/stages/${stage}`, null, { params: voice ? { voice } : {} }),
+    getPages: (id, highlight) => api.get(`/documents/${id}/pages`, { params: highlight ? { highlight } : {} }),
+    pageUrl: (id, page, { zoom, format, highlight } = {}) =>
+        `${API_URL}/documents/${id}/pages/${page}${queryString({ zoom, format, highlight })}`,
+    thumbnailUrl: (id, page, { format, highlight } = {}) =>
+        `${API_URL}/documents/${id}/pages/${page}/thumbnail${queryString({ format, highlight })}`,
     generateSelectionAudio: (text) => api.post('/generate-selection-audio', null, { params: { text } }),
 };
 
@@ -0,0 +1,101 @@
+import React, { useEffect, useRef, useState } from 'react';
+import { Loader2 } from 'lucide-react';
+import { documentApi } from '../api/client';
+
+// Renders each page as a server-side image and only requests pages that are
+// (nearly) visible, so the first paint does not wait for the whole PDF.
+const LazyPage = ({ src, thumbnailSrc, width, height, number }) => {
+    const ref = useRef(null);
+    const [visible, setVisible] = useState(false);
+    const [loaded, setLoaded] = useState(false);
+
+    useEffect(() => {
+        const observer = new IntersectionObserver(
+            ([entry]) => {
+                if (entry.isIntersecting) {
+                    setVisible(true);
+                    observer.disconnect();
+                }
+            },
+            { rootMargin: '800px 0px' }
+        );
+        if (ref.current) observer.observe(ref.current);
+        return () => observer.disconnect();
+    }, []);
+
+    return (
+        <div
+            ref={ref}
+            className="relative w-full bg-white/5 rounded-lg overflow-hidden shadow-xl"
+            style={{ aspectRatio: `${width} / ${height}` }}
+        >
+            {visible && (
+                <>
+                    {/* Thumbnail is usually pre-warmed, so it shows while the full page renders */}
+                    {!loaded && <img src={thumbnailSrc} alt="" className="absolute inset-0 w-full h-full object-contain blur-sm" />}
+                    <img
+                        src={src}
+                        alt={`Page ${number}`}
+                        onLoad={() => setLoaded(true)}
+                        className="absolute inset-0 w-full h-full object-contain"
+                    />
+                </>
+            )}
+            <span className="absolute bottom-2 right-3 text-[10px] font-bold text-slate-500">{number}</span>
+        </div>
+    );
+};
+
+// zoom/format default to the server's values from GET /pages, which are the
+// ones the page cache is pre-warmed with
+const PageImageViewer = ({ documentId, highlight, zoom, format }) => {
+    const [pages, setPages] = useState(null);
+    const [defaults, setDefaults] = useState(null);
+    const [error, setError] = useState(null);
+
+    useEffect(() => {
+        setPages(null);
+        setError(null);
+        documentApi.getPages(documentId, highlight)
+            .then((res) => {
+                setDefaults({ zoom: res.data.default_zoom, format: res.data.default_format });
+                setPages(res.data.pages);
+            })
+            .catch((err) => {
+                console.error("Page metadata error:", err);
+                setError("Could not load pages");
+            });
+    }, [documentId, highlight]);
+
+    if (error) {
+        return <div className="h-full w-full flex items-center justify-center text-slate-500 italic">{error}</div>;
+    }
+
+    if (!pages) {
+        return (
+            <div className="h-full w-full flex items-center justify-center text-slate-500 italic bg-[#1e1933]">
+                <Loader2 className="animate-spin mr-2" /> Loading Pages...
+            </div>
+        );
+    }
+
+    const pageZoom = zoom ?? defaults.zoom;
+    const pageFormat = format ?? defaults.format;
+
+    return (
+        <div className="h-[800px] overflow-y-auto p-6 space-y-6 custom-scrollbar">
+            {pages.map((page) => (
+                <LazyPage
+                    key={page.number}
+                    number={page.number}
+                    width={page.width}
+                    height={page.height}
+                    src={documentApi.pageUrl(documentId, page.number, { zoom: pageZoom, format: pageFormat, highlight })}
+                    thumbnailSrc={documentApi.thumbnailUrl(documentId, page.number, { format: pageFormat, highlight })}
+                />
+            ))}
+        </div>
+    );
+};
+
+export default PageImageViewer;